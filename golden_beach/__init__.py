@@ -1,3 +1,6 @@
 from .sacs_from_base import *
 from .piping_loads import *
 from .soil_springs import *
+from .base_cache import *
+from .lcomb_rules import *
+from .cards import *
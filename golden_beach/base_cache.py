@@ -0,0 +1,158 @@
+
+import hashlib
+import io
+import numpy as np
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+PATH = Path('.')
+
+CACHE_SUFFIX = '.gbc'
+CACHE_VERSION = 2
+MAX_CACHE_BYTES = 16_000_000
+
+SECTION_VARS = ['MEMBER', 'JOINT', 'CODE', 'LOAD']
+INDEX_NAMES = ['joints', 'members']
+
+
+@dataclass
+class BaseDeck:
+    """Parsed SACS base model.
+
+    Attributes:
+        lines (list[str]): Lines of the base file, including line endings.
+        sections (dict[str, int]): Line index of the last MEMBER, JOINT, CODE and
+            LOAD line and of the first END line.
+        joints (dict[str, int]): Line index of the first line of each joint,
+            e.g. {'PS01': 120}.
+        members (dict[str, int]): Line index of the first line of each member,
+            e.g. {'PS01PS02': 300}.
+
+    """
+    lines: list[str]
+    sections: dict[str, int] = field(default_factory=dict)
+    joints: dict[str, int] = field(default_factory=dict)
+    members: dict[str, int] = field(default_factory=dict)
+
+
+def cache_path(basepath: Path) -> Path:
+
+    return basepath.with_name(basepath.name + CACHE_SUFFIX)
+
+
+def parse_base_deck(lines: list[str]) -> BaseDeck:
+
+    deck = BaseDeck(lines)
+    ends = []
+    for iln, line in enumerate(lines):
+        for var in SECTION_VARS:
+            if line[:len(var)] == var:
+                deck.sections[var] = iln
+        if line.strip() == 'END':
+            ends.append(iln)
+
+        if line[:5] == 'JOINT' and len(line) > 10:
+            deck.joints.setdefault(line[6:10], iln)
+        elif line[:6] == 'MEMBER' and len(line) > 10:
+            mem_id = line[7:15]
+            if mem_id.strip() != 'OFFSETS':
+                deck.members.setdefault(mem_id, iln)
+
+    if ends:
+        deck.sections['END'] = ends[0]
+
+    return deck
+
+
+def _index_arrays(index: dict[str, int]) -> tuple[np.ndarray, np.ndarray]:
+
+    keys = np.array([key.encode() for key in index], dtype='S8')
+    vals = np.fromiter(index.values(), dtype=np.int32, count=len(index))
+
+    return keys, vals
+
+
+def write_cache(deck: BaseDeck, digest: str, cpath: Path, max_bytes: int) -> bool:
+
+    arrays = {
+        'version': np.array(CACHE_VERSION),
+        'digest': np.array(digest.encode()),
+        'nline': np.array(len(deck.lines)),
+    }
+    for name in ['sections'] + INDEX_NAMES:
+        arrays[f'{name}_keys'], arrays[f'{name}_lines'] = _index_arrays(getattr(deck, name))
+
+    with open(cpath, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+
+    # Cache size is bounded, drop caches that are too large to be worth keeping
+    if cpath.stat().st_size > max_bytes:
+        cpath.unlink()
+        return False
+
+    return True
+
+
+def read_cache(lines: list[str], digest: str, cpath: Path) -> BaseDeck | None:
+
+    try:
+        with np.load(cpath, allow_pickle=False) as data:
+            if int(data['version']) != CACHE_VERSION:
+                return None
+            if data['digest'].item().decode() != digest:
+                return None
+            if int(data['nline']) != len(lines):
+                return None
+            deck = BaseDeck(lines)
+            for name in ['sections'] + INDEX_NAMES:
+                keys = data[f'{name}_keys'].tolist()
+                vals = data[f'{name}_lines'].tolist()
+                setattr(deck, name, {key.decode(): val for key, val in zip(keys, vals)})
+    except (OSError, EOFError, ValueError, KeyError, zipfile.BadZipFile):
+        # Missing or corrupt cache is rebuilt by the caller
+        return None
+
+    return deck
+
+
+def load_base_deck(basename: str | Path, use_cache: bool = True,
+                   max_bytes: int = MAX_CACHE_BYTES) -> BaseDeck:
+    """Read a SACS base model, using a compiled cache stored next to it.
+
+    The cache (basename + '.gbc') holds the section line indices and the
+    joint and member indexes used by make_new_model. The card data itself is
+    not cached, the base file is always read and its SHA-256 hash is used to
+    validate the cache, which is rebuilt if stale.
+
+    Args:
+        basename (str): SACS base model filename.
+        use_cache (bool): Read and write the cache file.
+        max_bytes (int): Cache files larger than this are not kept.
+
+    Returns:
+        BaseDeck object.
+
+    """
+
+    basepath = PATH.joinpath(basename)
+    with open(basepath, 'rb') as f:
+        raw = f.read()
+    # Decode as open(basepath, 'r') would, including newline translation
+    lines = io.TextIOWrapper(io.BytesIO(raw)).readlines()
+
+    if not use_cache:
+        return parse_base_deck(lines)
+
+    digest = hashlib.sha256(raw).hexdigest()
+    cpath = cache_path(basepath)
+    deck = read_cache(lines, digest, cpath)
+    if deck is None:
+        deck = parse_base_deck(lines)
+        try:
+            write_cache(deck, digest, cpath, max_bytes)
+        except OSError:
+            # e.g. read-only folder, carry on without a cache
+            pass
+
+    return deck
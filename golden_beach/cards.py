@@ -0,0 +1,305 @@
+
+import re
+import numpy as np
+from dataclasses import dataclass, field
+from pathlib import Path
+from .piping_loads import load_str
+from .sacs_from_base import jnt_coords, jnt_str, mem_str
+
+PATH = Path('.')
+
+
+@dataclass
+class CardLayout:
+    """Fixed column layout of a SACS card.
+
+    Columns are 0-based, end exclusive, i.e. the same as Python slices of a
+    line (e.g. joint of a LOAD card is line[4:11]).
+
+    Attributes:
+        card (str): Text at start of line, e.g. 'LOAD '.
+        fields (list[tuple[str, int, int, str]]): Field name, start column, end
+            column and type ('U' text or 'f' float).
+        skip (list[tuple[int, int, str]]): Lines are skipped if the text
+            between start and end column matches, e.g. MEMBER OFFSETS lines.
+        require (list[tuple[int, int, str]]): Lines are only read if the text
+            between start and end column matches, e.g. JOIN of joint loads.
+        parent (tuple[str, int, int, str]): Card of the preceding parent line,
+            start column, end column and field name, e.g. LOADCN of LOAD lines.
+        offsets (list[tuple[str, str, float]]): Field, offset field and scale,
+            the scaled offset (blank is zero) is added to the field, e.g. JOINT
+            offsets in cm added to coordinates in m.
+
+    """
+    card: str
+    fields: list[tuple[str, int, int, str]]
+    skip: list[tuple[int, int, str]] = field(default_factory=list)
+    require: list[tuple[int, int, str]] = field(default_factory=list)
+    parent: tuple[str, int, int, str] | None = None
+    offsets: list[tuple[str, str, float]] = field(default_factory=list)
+
+
+# Column positions match load_str, jnt_coords/jnt_str and mem_str
+CARD_LAYOUTS = {
+    'LOAD': CardLayout(
+        'LOAD ',
+        [('joint', 4, 11, 'U'),
+         ('fx', 16, 23, 'f'), ('fy', 23, 30, 'f'), ('fz', 30, 37, 'f'),
+         ('mx', 37, 44, 'f'), ('my', 45, 52, 'f'), ('mz', 52, 59, 'f'),
+         ('remark', 72, 80, 'U')],
+        require=[(65, 69, 'JOIN')],
+        parent=('LOADCN', 6, 10, 'loadcn')),
+    'LOADCN': CardLayout('LOADCN', [('loadcn', 6, 10, 'U')]),
+    'JOINT': CardLayout(
+        'JOINT ',
+        [('joint', 6, 10, 'U'),
+         ('x', 11, 18, 'f'), ('y', 18, 25, 'f'), ('z', 25, 32, 'f'),
+         ('dx', 32, 39, 'f'), ('dy', 39, 46, 'f'), ('dz', 46, 53, 'f'),
+         ('fixity', 54, 60, 'U')],
+        skip=[(54, 60, 'ELASTI')],
+        offsets=[('x', 'dx', 0.01), ('y', 'dy', 0.01), ('z', 'dz', 0.01)]),
+    'MEMBER': CardLayout(
+        'MEMBER',
+        [('joint_a', 7, 11, 'U'), ('joint_b', 11, 15, 'U'), ('grup', 16, 19, 'U'),
+         ('fix_a', 22, 28, 'U'), ('fix_b', 28, 34, 'U'), ('angle', 34, 41, 'f')],
+        skip=[(7, 14, 'OFFSETS')]),
+}
+
+SOIL_KINDS = ['T-Z', 'BEAR', 'P-Y']
+SOIL_DATA_COL = 17
+SOIL_FIELD_WIDTH = 6
+
+
+def read_lines(deck: str | Path | bytes, width: int = 80) -> np.ndarray:
+    # Lines as a (nline, width) array of bytes, padded with spaces
+    if not isinstance(deck, bytes):
+        with open(PATH.joinpath(deck), 'rb') as f:
+            deck = f.read()
+
+    lines = deck.splitlines()
+    width = max(width, max(map(len, lines), default=0))
+    arr = np.array(lines, dtype=f'S{width}').view(np.uint8).reshape(len(lines), width)
+    arr = arr.copy()
+    arr[arr == 0] = ord(' ')
+
+    return arr
+
+
+def match_text(arr: np.ndarray, start: int, text: str) -> np.ndarray:
+
+    code = np.frombuffer(text.encode(), dtype=np.uint8)
+
+    return (arr[:, start:start + len(code)] == code).all(axis=1)
+
+
+def field_bytes(arr: np.ndarray, start: int, end: int) -> np.ndarray:
+    # One field of every line as a 1D array of bytes
+    return np.ascontiguousarray(arr[:, start:end]).view(f'S{end - start}').ravel()
+
+
+def fortran_float(text: bytes) -> float:
+    # SACS style exponent without 'e', e.g. '8.00-3'
+    text = text.decode().strip()
+    if not text:
+        return np.nan
+
+    return float(re.sub(r'(?<=[0-9.])([+-])', r'e\1', text))
+
+
+def to_float(col: np.ndarray) -> np.ndarray:
+
+    blank = np.char.strip(col) == b''
+    try:
+        return np.where(blank, b'nan', col).astype(float)
+    except ValueError:
+        return np.array([fortran_float(val) for val in col], dtype=float)
+
+
+def to_text(col: np.ndarray) -> np.ndarray:
+
+    return np.char.strip(col).astype('U')
+
+
+def parse_cards(arr: np.ndarray, layout: CardLayout) -> np.ndarray:
+
+    rows = match_text(arr, 0, layout.card)
+    for start, end, text in layout.skip:
+        rows &= ~match_text(arr, start, f'{text: <{end - start}}')
+    for start, end, text in layout.require:
+        rows &= match_text(arr, start, f'{text: <{end - start}}')
+    # Section headers (e.g. a bare JOINT line) have a blank first field
+    name, start, end, kind = layout.fields[0]
+    rows &= np.char.strip(field_bytes(arr, start, end)) != b''
+    irows = np.flatnonzero(rows)
+    lines = arr[irows]
+
+    fields = list(layout.fields)
+    if layout.parent is not None:
+        fields.insert(0, (layout.parent[3], layout.parent[1], layout.parent[2], 'U'))
+    dtype = [(name, 'f8' if kind == 'f' else f'U{end - start}')
+             for name, start, end, kind in fields]
+    out = np.empty(len(irows), dtype=dtype)
+
+    if layout.parent is not None:
+        card, start, end, name = layout.parent
+        iparent = np.flatnonzero(match_text(arr, 0, card))
+        parents = to_text(field_bytes(arr[iparent], start, end))
+        ind = np.searchsorted(iparent, irows) - 1
+        out[name] = ''
+        out[name][ind >= 0] = parents[ind[ind >= 0]]
+    for name, start, end, kind in layout.fields:
+        if kind == 'f':
+            out[name] = to_float(field_bytes(lines, start, end))
+        else:
+            out[name] = to_text(field_bytes(lines, start, end))
+    for name, offset, scale in layout.offsets:
+        out[name] += np.nan_to_num(out[offset]) * scale
+
+    return out
+
+
+def read_cards(deck: str | Path | bytes, card: str) -> np.ndarray:
+    """Read all cards of one type from a SACS file into a structured array.
+
+    Args:
+        deck (str): SACS filename, or file contents as bytes.
+        card (str): Card type, one of CARD_LAYOUTS (LOAD, LOADCN, JOINT, MEMBER).
+
+    Returns:
+        Structured array with one record per card, fields as in CARD_LAYOUTS.
+        Blank numeric fields are NaN. JOINT x, y and z include the offsets
+        (dx, dy, dz in cm).
+
+    """
+
+    return parse_cards(read_lines(deck), CARD_LAYOUTS[card])
+
+
+def read_soil_curves(deck: str | Path | bytes) -> np.ndarray:
+    """Read T-Z, Q-Z (BEAR) and P-Y curves from a SACS file.
+
+    Values are as written on the SOIL cards (i.e. SACS units).
+
+    Args:
+        deck (str): SACS filename, or file contents as bytes.
+
+    Returns:
+        Structured array with one record per depth layer and fields kind, npt,
+        ztop, zbot, res and disp. res and disp are padded with NaN up to the
+        largest number of points.
+
+    """
+
+    return parse_soil(read_lines(deck))
+
+
+def parse_soil(arr: np.ndarray) -> np.ndarray:
+
+    arr = arr[match_text(arr, 0, 'SOIL ')]
+    header = match_text(arr, 13, 'SLOCSM')
+    kind = to_text(field_bytes(arr, 5, 9))
+    header &= np.isin(kind, SOIL_KINDS)
+    data = (np.char.strip(field_bytes(arr, 5, 13)) == b'') & ~header
+
+    # Layer of each data line is the preceding header
+    layer = np.cumsum(header) - 1
+    ok = data & (layer >= 0)
+    heads = arr[header]
+    nlayer = len(heads)
+
+    # All point values on data lines, pairs of resistance and displacement
+    nfield = 2 * ((arr.shape[1] - SOIL_DATA_COL) // (2 * SOIL_FIELD_WIDTH))
+    lines = arr[ok]
+    vals = np.column_stack([
+        to_float(field_bytes(lines, SOIL_DATA_COL + i * SOIL_FIELD_WIDTH,
+                        SOIL_DATA_COL + (i + 1) * SOIL_FIELD_WIDTH))
+        for i in range(nfield)]) if len(lines) else np.zeros((0, 2))
+    res = vals[:, 0::2]
+    disp = vals[:, 1::2]
+
+    # Concatenate points of continuation lines of each layer
+    lay = np.repeat(layer[ok], res.shape[1])
+    valid = ~np.isnan(res.ravel())
+    lay = lay[valid]
+    counts = np.bincount(lay, minlength=nlayer)
+    pos = np.arange(len(lay)) - (np.cumsum(counts) - counts)[lay]
+    maxpt = max(counts.max(initial=0), 1)
+
+    out = np.empty(nlayer, dtype=[('kind', 'U4'), ('npt', 'i4'), ('ztop', 'f8'),
+                                  ('zbot', 'f8'), ('res', 'f8', (maxpt,)),
+                                  ('disp', 'f8', (maxpt,))])
+    out['kind'] = kind[header]
+    out['npt'] = np.nan_to_num(to_float(field_bytes(heads, 21, 23)))
+    out['ztop'] = to_float(field_bytes(heads, 24, 30))
+    out['zbot'] = to_float(field_bytes(heads, 30, 36))
+    out['res'] = np.nan
+    out['disp'] = np.nan
+    out['res'][lay, pos] = res.ravel()[valid]
+    out['disp'][lay, pos] = disp.ravel()[valid]
+
+    return out
+
+
+def read_deck(deck: str | Path | bytes) -> dict[str, np.ndarray]:
+    """Read LOAD, LOADCN, JOINT, MEMBER and SOIL cards from a SACS file.
+
+    Args:
+        deck (str): SACS filename, or file contents as bytes.
+
+    Returns:
+        Structured array for each card type.
+
+    """
+
+    arr = read_lines(deck)
+    cards = {card: parse_cards(arr, layout) for card, layout in CARD_LAYOUTS.items()}
+    cards['SOIL'] = parse_soil(arr)
+
+    return cards
+
+
+def loads_to_str(loads: np.ndarray) -> str:
+    """Write LOAD cards from a structured array (see read_cards) with load_str."""
+
+    outstr = ''
+    values = np.column_stack([loads[var] for var in ['fx', 'fy', 'fz', 'mx', 'my', 'mz']])
+    for rec, vals in zip(loads, values):
+        outstr += load_str(rec['joint'], vals, rec['remark'])
+
+    return outstr
+
+
+def joints_to_str(joints: np.ndarray) -> str:
+    """Write JOINT cards from a structured array (see read_cards) with jnt_str.
+
+    Coordinates are written as x, y and z, which include the offsets, so the
+    offset columns are left blank.
+
+    """
+
+    outstr = ''
+    for rec in joints:
+        row = {'JNT': rec['joint'], 'X': rec['x'], 'Y': rec['y'], 'Z': rec['z'],
+               'Special': rec['fixity'] or -123456}
+        for var in ['FX', 'FY', 'FZ', 'FRX', 'FRY', 'FRZ']:
+            row[var] = -123456
+        outstr += jnt_str(row, jnt_coords(row)) + '\n'
+
+    return outstr
+
+
+def members_to_str(members: np.ndarray) -> str:
+    """Write MEMBER cards from a structured array (see read_cards) with mem_str."""
+
+    outstr = ''
+    for rec in members:
+        row = {'ID': f'{rec["joint_a"]: <4}{rec["joint_b"]: <4}', 'GRUP': f'{rec["grup"]: <3}',
+               'STRESS': -123456, 'GAP': -123456,
+               'FIX_A': rec['fix_a'] or -123456, 'FIX_B': rec['fix_b'] or -123456,
+               'ANGLE': -123456 if np.isnan(rec['angle']) else rec['angle']}
+        for end in ['A', 'B']:
+            for dof in ['X', 'Y', 'Z']:
+                row[f'OFF_{end}{dof}'] = -123456
+        outstr += mem_str(row, ' ') + '\n'
+
+    return outstr
@@ -0,0 +1,178 @@
+
+import numpy as np
+from dataclasses import dataclass, field
+from .sacs_from_base import lcsel_str
+
+
+@dataclass
+class CaseGroup:
+    """Group of basic load cases.
+
+    Attributes:
+        name (str): Group name, used in factor sets (e.g. 'dead').
+        cases (list[str]): Basic load case names (e.g. ['C000', 'C045']).
+        axis (str): If None, all cases of the group are included in every
+            combination. Otherwise one case of the group is used in each
+            combination. Groups with the same axis (e.g. 'dir') are expanded
+            together, different axes are expanded against each other.
+
+    """
+    name: str
+    cases: list[str]
+    axis: str | None = None
+
+
+@dataclass
+class LcombRule:
+    """Rule generating load combinations.
+
+    Each factor set gives the product of the number of cases on the axes of
+    the groups it names, e.g. a factor set naming only groups without an axis
+    gives one combination.
+
+    Attributes:
+        groups (list[CaseGroup]): Case groups.
+        factors (list[dict[str, float]]): Factor sets, e.g.
+            [{'dead': 1.1, 'live': 1.0, 'env': 1.35}]. Groups missing from a
+            factor set are not included.
+        prefix (str): Combination name prefix, e.g. 'A' gives A001, A002...
+        start (int): Number of first combination.
+
+    """
+    groups: list[CaseGroup]
+    factors: list[dict[str, float]] = field(default_factory=list)
+    prefix: str = ''
+    start: int = 1
+
+
+def rule_axes(rule: LcombRule) -> dict[str, int]:
+    # Number of cases on each axis, in order of first use
+    axes = {}
+    for group in rule.groups:
+        if group.axis is None:
+            continue
+        ncase = axes.setdefault(group.axis, len(group.cases))
+        if ncase != len(group.cases):
+            raise ValueError(f'Groups on axis {group.axis} must have the same number of cases')
+
+    return axes
+
+
+def factor_axes(rule: LcombRule, factors: dict[str, float]) -> dict[str, int]:
+    # Axes of the groups named in one factor set, in rule order
+    groups = {group.name: group for group in rule.groups}
+    for name in factors:
+        if name not in groups:
+            raise ValueError(f'Unknown case group {name}')
+    used = {groups[name].axis for name in factors}
+
+    return {axis: ncase for axis, ncase in rule_axes(rule).items() if axis in used}
+
+
+def generate_lcombs(rules: list[LcombRule]) -> tuple[list[str], list[str], np.ndarray]:
+    """Generate load combinations from rules.
+
+    Args:
+        rules (list[LcombRule]): Rules, combinations are numbered in order.
+
+    Returns:
+        Combination names, basic load case names and combination matrix of load
+        factors (one row per combination, one column per basic load case, zero
+        where a case isn't included).
+
+    """
+
+    loadcns = {}
+    for rule in rules:
+        for group in rule.groups:
+            for case in group.cases:
+                loadcns.setdefault(str(case), len(loadcns))
+
+    names = []
+    blocks = []
+    for rule in rules:
+        groups = {group.name: group for group in rule.groups}
+        axes = [factor_axes(rule, factors) for factors in rule.factors]
+        nexps = [int(np.prod(list(sizes.values()))) for sizes in axes]
+        starts = np.cumsum([0] + nexps)
+
+        ncomb = int(starts[-1])
+        ndigit = 4 - len(rule.prefix)
+        if rule.start + ncomb - 1 >= 10**ndigit:
+            raise ValueError(f'Too many combinations for prefix "{rule.prefix}"')
+        names += [f'{rule.prefix}{i:0{ndigit}d}' for i in range(rule.start, rule.start + ncomb)]
+
+        block = np.zeros((ncomb, len(loadcns)))
+        for ifac, factors in enumerate(rule.factors):
+            sizes = list(axes[ifac].values())
+            nexp = nexps[ifac]
+            # Case index on each axis for each expansion, last axis varies fastest
+            grid = dict(zip(axes[ifac], np.indices(sizes).reshape(len(sizes), nexp)))
+            rows = np.arange(starts[ifac], starts[ifac + 1])
+            for name, factor in factors.items():
+                group = groups[name]
+                cols = np.array([loadcns[str(case)] for case in group.cases])
+                if group.axis is None:
+                    block[rows[:, None], cols[None, :]] += factor
+                else:
+                    block[rows, cols[grid[group.axis]]] += factor
+        empty = np.flatnonzero(~block.any(axis=1))
+        if len(empty):
+            # No LCOMB line would be written for these, but LCSEL would select them
+            raise ValueError(f'Combination {names[len(names) - ncomb + empty[0]]} has no load cases, '
+                             'check for empty factor sets or factors summing to zero')
+        blocks.append(block)
+
+    if len(set(names)) != len(names):
+        raise ValueError('Duplicate combination names, check prefix and start of rules')
+
+    matrix = np.concatenate(blocks) if blocks else np.zeros((0, len(loadcns)))
+
+    return names, list(loadcns), matrix
+
+
+def factor_str(val: float) -> str:
+    # Load factor in 6 columns, fewer decimals for large factors
+    for ndec in [3, 2, 1, 0]:
+        val_str = f'{val:6.{ndec}f}'
+        if len(val_str) <= 6:
+            return val_str
+
+    raise ValueError(f'Load factor {val} does not fit in 6 columns')
+
+
+def lcomb_matrix_str(names: list[str], loadcns: list[str], matrix: np.ndarray) -> str:
+
+    # Up to 6 load cases per line, continued on a new line with the same name
+    cases = [f'{loadcn: >4}' for loadcn in loadcns]
+    fmt = {}
+    lines = ['LCOMB']
+    for name, row in zip(names, matrix):
+        icols = np.flatnonzero(row)
+        pairs = []
+        for icol in icols:
+            val = row[icol]
+            if val not in fmt:
+                fmt[val] = factor_str(val)
+            pairs.append(cases[icol] + fmt[val])
+        for ipair in range(0, len(pairs), 6):
+            lines.append(f'LCOMB {name: >4} ' + ''.join(pairs[ipair:ipair + 6]))
+
+    return '\n'.join(lines) + '\n'
+
+
+def lcomb_rules_str(rules: list[LcombRule], lc_type: str = 'IN') -> tuple[str, str]:
+    """Write load combinations generated from rules in SACS format.
+
+    Args:
+        rules (list[LcombRule]): Rules, combinations are numbered in order.
+        lc_type (str): LCSEL type, e.g. 'IN'.
+
+    Returns:
+        LCOMB lines and LCSEL lines (12 combinations per line).
+
+    """
+
+    names, loadcns, matrix = generate_lcombs(rules)
+
+    return lcomb_matrix_str(names, loadcns, matrix), lcsel_str(lc_type, names)
@@ -2,69 +2,305 @@
 import pandas as pd
 from openpyxl import load_workbook
 from pathlib import Path
+from typing import Any, Iterator
 import numpy as np
 
 PATH = Path('.')
 
 
+def is_number(val: Any) -> bool:
+
+    return isinstance(val, (int, float)) and not isinstance(val, bool)
+
+
+def is_data_row(row: tuple, cols: list[int]) -> bool:
+    # Label left of the data and only numbers (or blanks) in the data columns
+    if all(val is None for val in row[:min(cols) - 1]):
+        return False
+
+    return all(row[i] is None or is_number(row[i]) for col in cols for i in range(col - 1, col + 5))
+
+
+def is_blank_label(label: Any) -> bool:
+
+    return label is None or str(label).strip() == ''
+
+
+def read_support_table(ws: Any, cols: list[int]) -> tuple[list[str], np.ndarray]:
+    """Read support labels and load data from a worksheet.
+
+    The table starts at the first row with a label to the left of the first
+    data column and only numbers in the data columns, so titles and header
+    rows above are ignored. Support rows with blank data directly above it
+    (same label column) are included. The leftmost value in the first row with
+    a number is the label column. Data rows continue until the first blank
+    label.
+
+    Args:
+        ws (Any): openpyxl worksheet.
+        cols (list[int]): First column of each 6 column block of data.
+
+    Returns:
+        Support labels and data, one row per support and 6 columns per block.
+
+    """
+
+    first_col = min(cols)
+    max_col = max(cols) + 5
+    label_col = None
+    blank_rows = []
+    labels = []
+    data = []
+    for row in ws.iter_rows(max_col=max_col, values_only=True):
+        if label_col is None:
+            if not is_data_row(row, cols):
+                blank_rows = []
+                continue
+            if not any(is_number(row[i]) for col in cols for i in range(col - 1, col + 5)):
+                # Blank support or title, known once the first number is found
+                blank_rows.append(row)
+                continue
+            label_col = next(icol for icol, val in enumerate(row[:first_col - 1])
+                             if val is not None)
+            nblank = 0
+            while nblank < len(blank_rows) and not is_blank_label(blank_rows[-1 - nblank][label_col]):
+                nblank += 1
+            for blank_row in blank_rows[len(blank_rows) - nblank:]:
+                labels.append(blank_row[label_col])
+                data.append([0.0] * 6 * len(cols))
+        label = row[label_col]
+        if is_blank_label(label):
+            break
+        labels.append(label)
+        data.append([0.0 if row[i] is None else row[i]
+                     for col in cols for i in range(col - 1, col + 5)])
+
+    data = np.asarray(data, dtype=float).reshape(len(labels), 6 * len(cols))
+
+    return labels, data
+
+
+def iter_piping_loads(xlname: str | Path) -> Iterator[tuple[Any, list[str], np.ndarray]]:
+    """Read load cases from a spreadsheet one at a time.
+
+    Only the data for one worksheet is held in memory at a time.
+
+    Args:
+        xlname (str): Spreadsheet filename.
+
+    Yields:
+        Row of Load Case ID sheet, support labels and loads in kN/kNm
+        (one row per support, 6 columns).
+
+    """
+
+    xlpath = PATH.joinpath(xlname)
+
+    loadcns = pd.read_excel(xlpath, sheet_name='Load Case ID',
+                            converters={'LOAD_ID': str, 'SUFFIX': str})
+
+    wb = load_workbook(xlpath, read_only=True, data_only=True)
+    try:
+        sheet = None
+        for row in loadcns.itertuples():
+            if row.Sheet != sheet:
+                sheet = row.Sheet
+                cols = sorted(set(loadcns.loc[loadcns['Sheet'] == sheet, 'Column'].astype(int)))
+                sup_labels, data = read_support_table(wb[sheet], cols)
+            icol = cols.index(int(row.Column))
+            yield row, sup_labels, data[:, 6 * icol:6 * icol + 6] / 1000
+    finally:
+        wb.close()
+
+
+def load_str(joint: str, loads: np.ndarray, remark: str) -> str:
+
+    outstr = f'LOAD{joint: >7}' + ' '*5
+    for val in loads[:4]:
+        outstr += f'{val:7.1f}'
+    outstr += ' '
+    for val in loads[4:]:
+        outstr += f'{val:7.1f}'
+    if len(remark) > 8:
+        remark = remark[:8]
+
+    outstr += ' GLOB JOIN   '
+    outstr += f'{remark: >8}\n'
+
+    return outstr
+
+
+def loadcn_str(row: Any, sup_labels: list[str], data: np.ndarray) -> str:
+
+    loadcn = row.LOADCN
+    suffix = row.SUFFIX
+    loadlb = row.LOADLB
+    loadid = row.LOAD_ID
+
+    outstr = 'LOADCN' + f'{loadcn: >4} 1.00\n'
+    outstr += 'LOADLB' + f'{loadcn: >4} {loadlb}\n'
+
+    ndata = np.shape(data)[0]
+    for irow in range(ndata):
+        joint = sup_labels[irow]
+        if loadid == 'PSXX':
+            remark = f'{joint}_{suffix}'
+        else:
+            remark = str(loadid)
+        outstr += load_str(joint, data[irow, :], remark)
+
+    return outstr
+
+
+def iter_loadcn_blocks(xlname: str | Path) -> Iterator[str]:
+    """Generate SACS LOADCN blocks from a spreadsheet, one load case at a time.
+
+    Args:
+        xlname (str): Spreadsheet filename.
+
+    Yields:
+        LOADCN, LOADLB and LOAD lines for one load case.
+
+    """
+
+    for row, sup_labels, data in iter_piping_loads(xlname):
+        yield loadcn_str(row, sup_labels, data)
+
+
 def write_piping_loads(xlname: str | Path, outname: str | Path) -> None:
     """Write load data from a spreadsheet to a SACS format file.
 
+    Load cases are written as they are read, so the output is never held in
+    memory.
+
     Args:
         xlname (str): Spreadsheet filename.
         outname (str): Output filename.
 
     """
 
-    xlpath = PATH.joinpath(xlname)
     outpath = PATH.joinpath(outname)
 
-    loadcns = pd.read_excel(xlpath, sheet_name='Load Case ID',
-                            converters={'LOAD_ID': str, 'SUFFIX': str})
+    with open(outpath, 'w') as f:
+        for block in iter_loadcn_blocks(xlname):
+            f.write(block)
+
+
+def read_load_cases(xlname: str | Path) -> tuple[list[Any], list[tuple[list[str], np.ndarray]],
+                                                   list[str], np.ndarray]:
+    """Read all load cases from a spreadsheet into one array.
+
+    Args:
+        xlname (str): Spreadsheet filename.
+
+    Returns:
+        Rows of Load Case ID sheet, support labels and loads of each case as
+        read (see iter_piping_loads), joints (all support labels in order of
+        first use) and loads in kN/kNm as a (cases x joints x 6) array. Loads
+        are zero where a case has no support and summed where a support label
+        is repeated.
+
+    """
+
+    rows = []
+    cases = []
+    joints = {}
+    for row, sup_labels, data in iter_piping_loads(xlname):
+        rows.append(row)
+        cases.append((sup_labels, data))
+        for joint in sup_labels:
+            joints.setdefault(joint, len(joints))
+
+    loads = np.zeros((len(cases), len(joints), 6))
+    for icase, (sup_labels, data) in enumerate(cases):
+        ind = [joints[joint] for joint in sup_labels]
+        np.add.at(loads[icase], ind, data)
+
+    return rows, cases, list(joints), loads
+
 
-    outstr = ''
-    for row in loadcns.itertuples():
-        sheet = row.Sheet
-        col = int(row.Column)
-        loadcn = row.LOADCN
-        suffix = row.SUFFIX
-        loadlb = row.LOADLB
-        loadid = row.LOAD_ID
-
-        wb = load_workbook(xlpath, data_only=True)
-        ws = wb[sheet]
-        sup_labels = [ws.cell(row=i, column=1).value for i in range(3, 22)]
-        data = []
-        for irow in range(3, 22):
-            data.append([ws.cell(row=irow, column=i).value for i in range(col, col + 6)])
-        data = np.asarray(data) / 1000
-        # np.savetxt(PATH.joinpath('test.txt'), data)
-
-        outstr += 'LOADCN' + f'{loadcn: >4} 1.00\n'
-        outstr += 'LOADLB' + f'{loadcn: >4} {loadlb}\n'
-
-        ndata = np.shape(data)[0]
-        for irow in range(ndata):
-            joint = sup_labels[irow]
-            loads = data[irow, :]
-            outstr += f'LOAD{joint: >7}' + ' '*5
-            for val in loads[:4]:
-                outstr += f'{val:7.1f}'
-            outstr += ' '
-            for val in loads[4:]:
-                outstr += f'{val:7.1f}'
-            if loadid == 'PSXX':
-                remark = f'{joint}_{suffix}'
-            else:
-                remark = str(loadid)
-            if len(remark) > 8:
-                remark = remark[:8]
-
-            outstr += ' GLOB JOIN   '
-            outstr += f'{remark: >8}\n'
+def governing_cases(loads: np.ndarray, tol: float) -> np.ndarray:
+    """Find load cases that are dominated by another load case.
+
+    Case A is dominated by case B if, for every support and component, A is
+    within tol of zero, or has the same sign as B and is no larger than B + tol.
+    Near duplicates dominate each other, the one with the larger total load
+    is kept (the first one if equal).
+
+    Args:
+        loads (np.ndarray): Loads, (cases x joints x 6) array.
+        tol (float): Tolerance, same units as loads.
+
+    Returns:
+        Index of the governing case for each case (itself if it governs).
+
+    """
+
+    ncase = loads.shape[0]
+    flat = loads.reshape(ncase, -1)
+    absf = np.abs(flat)
+    sign = np.sign(flat)
+
+    # Largest cases first, so dominating cases are kept before the ones they cover
+    order = np.argsort(-absf.sum(axis=1), kind='stable')
+    gov = np.arange(ncase)
+    kept = []
+    for icase in order:
+        if kept:
+            ikept = np.asarray(kept)
+            small = absf[icase] <= tol
+            covered = (sign[icase] == sign[ikept]) & (absf[icase] <= absf[ikept] + tol)
+            dominated = (small | covered).all(axis=1)
+            if dominated.any():
+                # Closest of the dominating cases
+                diff = np.abs(flat[ikept] - flat[icase]).max(axis=1)
+                gov[icase] = ikept[np.argmin(np.where(dominated, diff, np.inf))]
+                continue
+        kept.append(icase)
+
+    return gov
+
+
+def reduce_piping_loads(xlname: str | Path, outname: str | Path, tol: float = 0.1,
+                        reportname: str | Path | None = None) -> pd.DataFrame:
+    """Write only the governing load cases from a spreadsheet to a SACS format file.
+
+    Load cases that are dominated by another load case at every support (see
+    governing_cases) are not written. Governing load cases are written as
+    read, with the same LOAD lines as write_piping_loads.
+
+    Args:
+        xlname (str): Spreadsheet filename.
+        outname (str): Output filename.
+        tol (float): Tolerance in kN and kNm.
+        reportname (str): If given, the report is also written to this csv file.
+
+    Returns:
+        Report with the governing load case of each load case and the largest
+        difference between them (kN or kNm).
+
+    """
+
+    outpath = PATH.joinpath(outname)
+
+    rows, cases, joints, loads = read_load_cases(xlname)
+    gov = governing_cases(loads, tol)
 
     with open(outpath, 'w') as f:
-        f.write(outstr)
+        for icase, (row, (sup_labels, data)) in enumerate(zip(rows, cases)):
+            if gov[icase] == icase:
+                f.write(loadcn_str(row, sup_labels, data))
+
+    report = pd.DataFrame({
+        'LOADCN': [row.LOADCN for row in rows],
+        'LOADLB': [row.LOADLB for row in rows],
+        'GOVERNING': [rows[igov].LOADCN for igov in gov],
+        'MAX_DIFF': np.abs(loads[gov] - loads).max(axis=(1, 2), initial=0.0),
+    })
+    if reportname is not None:
+        report.to_csv(PATH.joinpath(reportname), index=False)
+
+    return report
 
 
 def main():
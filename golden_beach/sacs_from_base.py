@@ -4,6 +4,7 @@ import pandas as pd
 import os
 from pathlib import Path
 from typing import Any
+from .base_cache import load_base_deck
 
 PATH = Path('.')
 
@@ -137,6 +138,19 @@ def lcomb_str(lcomb: pd.DataFrame) -> str:
     return outstr
 
 
+def lcsel_str(lc_type: str, loadcns: list) -> str:
+
+    # 12 load cases per line
+    outstr = ''
+    for ilc in range(0, len(loadcns), 12):
+        outstr += f'LCSEL {lc_type: <9}'
+        for loadcn in loadcns[ilc:ilc + 12]:
+            outstr += f'{loadcn: >5}'
+        outstr += '\n'
+
+    return outstr
+
+
 def read_loadfiles(loadfiles: list[str]) -> str:
 
     outstr = ''
@@ -151,7 +165,7 @@ def read_loadfiles(loadfiles: list[str]) -> str:
     return outstr
 
 
-def make_new_model(xlname: str, basename: str, newname: str):
+def make_new_model(xlname: str, basename: str, newname: str, use_cache: bool = True):
     """Create new SACS model from a base model and a spreadsheet.
 
     Add new or modify existing joints/members, add/remove basic load conditions,
@@ -161,6 +175,8 @@ def make_new_model(xlname: str, basename: str, newname: str):
         xlname (str): Spreadsheet filename.
         basename (str): SACS base model filename.
         newname (str): SACS output filename.
+        use_cache (bool): Use the compiled cache of the base model, stored next
+            to it as basename + '.gbc'. Stale caches are rebuilt automatically.
 
     """
 
@@ -216,17 +232,7 @@ def make_new_model(xlname: str, basename: str, newname: str):
 
     lcsel = pd.read_excel(xlpath, sheet_name='LCSEL', header=None, skiprows=1, usecols='A:B')
     lc_type = lcsel.iloc[0][1]
-    irow = 0
-    lcsel_str = f'LCSEL {lc_type: <9}'
-    for row in lcsel.itertuples():
-        if irow == 0:
-            irow += 1
-            continue
-        lcsel_str += f'{row._2: >5}'
-        if irow % 12 == 0:
-            lcsel_str += f'\nLCSEL {lc_type: <9}'
-        irow += 1
-    lcsel_str += '\n'
+    lcsel_lines = lcsel_str(lc_type, list(lcsel[1].iloc[1:]))
 
     loadcns_df = pd.read_excel(xlpath, sheet_name='LOADCN')
     loadcns = []
@@ -250,157 +256,142 @@ def make_new_model(xlname: str, basename: str, newname: str):
 
     notes = pd.read_excel(xlpath, sheet_name='Notes', header=None, skiprows=1)
 
-    # First, loop through file to find indices where new lines will be inserted
-    vars = ['MEMBER', 'JOINT', 'CODE', 'LOAD']
-    ends = []
-    sections = {}
-    with open(PATH.joinpath(basename), 'r') as f:
-        iln = 0
-        for line in f:
-            for var in vars:
-                if line[:len(var)] == var:
-                    sections[var] = iln
-                if line.strip() == 'END':
-                    ends.append(iln)
-            iln += 1
-    sections['END'] = ends[0]
+    # Indices where new lines will be inserted come from the (cached) base deck
+    deck = load_base_deck(basename, use_cache=use_cache)
+    sections = deck.sections
+    new_joints = [jnt_id for jnt_id in new_joints if jnt_id not in deck.joints]
+    new_mems = [mem_id for mem_id in new_mems if mem_id not in deck.members]
 
     copy_line = True
     outstr = ''
-    with open(PATH.joinpath(basename), 'r') as f:
-
-        iln = -1
-        for line in f:
-            iln += 1
+    iln = -1
+    for line in deck.lines:
+        iln += 1
+
+        if line[:5] == 'LDOPT':
+            if ngrup > 0:  # if FLOODED
+                outstr += line[:41] + f'{water_depth:7.2f}'
+                outstr += 'GLOBMN    HYD   CMB\n'
+            else:
+                outstr += line
+            continue
 
-            if line[:5] == 'LDOPT':
-                if ngrup > 0:  # if FLOODED
-                    outstr += line[:41] + f'{water_depth:7.2f}'
-                    outstr += 'GLOBMN    HYD   CMB\n'
-                else:
-                    outstr += line
+        if line[:4] == 'GRUP' and len(line) > 6:
+            grup_label = line[5:8].strip()
+            if grup_label in grups_to_flood:
+                newline = line[:69] + 'F' + line[70:]
+                outstr += newline
                 continue
 
-            if line[:4] == 'GRUP' and len(line) > 6:
-                grup_label = line[5:8].strip()
-                if grup_label in grups_to_flood:
-                    newline = line[:69] + 'F' + line[70:]
-                    outstr += newline
-                    continue
+        if line.strip() == 'TITLE':
+            outstr += f'     {title}\n'
+            continue
 
-            if line.strip() == 'TITLE':
-                outstr += f'     {title}\n'
-                continue
+        if 'BASIC LOAD CASES' in line:
+            outstr += line + loadcn_str
+            continue
 
-            if 'BASIC LOAD CASES' in line:
-                outstr += line + loadcn_str
-                continue
+        if line.strip() == '***ADD NOTES':
+            for row in notes.itertuples():
+                outstr += str(row._1) + '\n'
+            continue
 
-            if line.strip() == '***ADD NOTES':
-                for row in notes.itertuples():
-                    outstr += str(row._1) + '\n'
-                continue
+        if line.strip() == '***ADD LOADS':
+            if len(loadfiles) > 0:
+                outstr += read_loadfiles(loadfiles) + '\n'
+            continue
 
-            if line.strip() == '***ADD LOADS':
-                if len(loadfiles) > 0:
-                    outstr += read_loadfiles(loadfiles) + '\n'
-                continue
+        if line.strip() == '***ADD LCOMB':
+            outstr += lcomb_str(lcomb) + 'END\n'
+            continue
 
-            if line.strip() == '***ADD LCOMB':
-                outstr += lcomb_str(lcomb) + 'END\n'
-                continue
+        if line.strip() == '***ADD CDM MGROV PGROV' and ngrup > 0:
+            fpath = PATH.joinpath('insert_files', 'inplace_MGROV CDM.txt')
+            with open(fpath, 'r') as f:
+                for line in f:
+                    outstr += line
+            continue
 
-            if line.strip() == '***ADD CDM MGROV PGROV' and ngrup > 0:
-                fpath = PATH.joinpath('insert_files', 'inplace_MGROV CDM.txt')
-                with open(fpath, 'r') as f:
-                    for line in f:
-                        outstr += line
-                continue
+        if 'ANALYSIS TYPE' in line:
+            outstr += f'****   ANALYSIS TYPE  : {analysis_type: <61}*\n'
+            continue
 
-            if 'ANALYSIS TYPE' in line:
-                outstr += f'****   ANALYSIS TYPE  : {analysis_type: <61}*\n'
-                continue
+        # LCSEL is inserted after last CODE
+        if iln == sections['CODE'] + 1:
+            outstr += lcsel_lines + line
+            continue
 
-            # LCSEL is inserted after last CODE
-            if iln == sections['CODE'] + 1:
-                outstr += lcsel_str + line
-                continue
+        # First END is ignored, moved to end of LCOMB
+        if iln == sections['END']:
+            continue
 
-            # First END is ignored, moved to end of LCOMB
-            if iln == sections['END']:
-                continue
+        # HYDRO strings are inserted before UCPART
+        if line[:6] == 'UCPART' and ngrup > 0:
+            outstr += hydro_str + line
+            continue
 
-            # HYDRO strings are inserted before UCPART
-            if line[:6] == 'UCPART' and ngrup > 0:
-                outstr += hydro_str + line
+        # Modify existing joint
+        if line[:5] == 'JOINT' and len(line) > 10:
+            jnt_id = line[6:10]
+            if jnt_id in jnts['JNT'].values:
+                if iln != deck.joints[jnt_id]:
+                    # This skips the second line (i.e. fixity) of an existing joint
+                    continue
+                ind = jnts.index[jnts['JNT'] == jnt_id].tolist()
+                jnt_dict = jnts.iloc[ind].to_dict(orient='records')[0]
+                newline = jnt_coords(jnt_dict)
+                if newline == 'xxx': # spreadsheet cells were blank
+                    outstr += jnt_str(jnt_dict, line.strip()) + '\n'
+                else:
+                    outstr += jnt_str(jnt_dict, newline) + '\n'
                 continue
 
-            # Modify existing joint
-            if line[:5] == 'JOINT' and len(line) > 10:
-                jnt_id = line[6:10]
-                if jnt_id in jnts['JNT'].values:
-                    if jnt_id in new_joints:
-                        new_joints.remove(jnt_id)
-                    else:
-                        # This skips the second line (i.e. fixity) of an existing joint
-                        continue
+        # Add new joints at end of JOINT section
+        if iln == sections['JOINT'] + 1:
+            if len(new_joints) > 0:
+                for jnt_id in new_joints:
                     ind = jnts.index[jnts['JNT'] == jnt_id].tolist()
                     jnt_dict = jnts.iloc[ind].to_dict(orient='records')[0]
                     newline = jnt_coords(jnt_dict)
-                    if newline == 'xxx': # spreadsheet cells were blank
-                        outstr += jnt_str(jnt_dict, line.strip()) + '\n'
-                    else:
-                        outstr += jnt_str(jnt_dict, newline) + '\n'
-                    continue
+                    outstr += jnt_str(jnt_dict, newline) + '\n'
+            outstr += line
+            continue
 
-            # Add new joints at end of JOINT section
-            if iln == sections['JOINT'] + 1:
-                if len(new_joints) > 0:
-                    for jnt_id in new_joints:
-                        ind = jnts.index[jnts['JNT'] == jnt_id].tolist()
-                        jnt_dict = jnts.iloc[ind].to_dict(orient='records')[0]
-                        newline = jnt_coords(jnt_dict)
-                        outstr += jnt_str(jnt_dict, newline) + '\n'
-                outstr += line
+        # Modify existing member
+        if line[:6] == 'MEMBER' and len(line) > 10:
+            mem_id = line[7:15]
+            if mem_id in mems['ID'].values:
+                if iln != deck.members[mem_id]:
+                    # This skips the second line (i.e. offset) of an existing member
+                    continue
+                ind = mems.index[mems['ID'] == mem_id].tolist()
+                mem_dict = mems.iloc[ind].to_dict(orient='records')[0]
+                outstr += mem_str(mem_dict, line.strip()) + '\n'
                 continue
 
-            # Modify existing member
-            if line[:6] == 'MEMBER' and len(line) > 10:
-                mem_id = line[7:15]
-                if mem_id in mems['ID'].values:
-                    if mem_id in new_mems:
-                        new_mems.remove(mem_id)
-                    else:
-                        # This skips the second line (i.e. offset) of an existing member
-                        continue
+        # Add new members
+        if (iln == sections['MEMBER'] + 1) and nmem > 0:
+            if len(new_mems) > 0:
+                for mem_id in new_mems:
                     ind = mems.index[mems['ID'] == mem_id].tolist()
                     mem_dict = mems.iloc[ind].to_dict(orient='records')[0]
-                    outstr += mem_str(mem_dict, line.strip()) + '\n'
-                    continue
-
-            # Add new members
-            if (iln == sections['MEMBER'] + 1) and nmem > 0:
-                if len(new_mems) > 0:
-                    for mem_id in new_mems:
-                        ind = mems.index[mems['ID'] == mem_id].tolist()
-                        mem_dict = mems.iloc[ind].to_dict(orient='records')[0]
-                        outstr += mem_str(mem_dict, ' ') + '\n'
-                outstr += line
-                continue
-
-            # Stop copying if loadcn is not in list of loadcns to keep
-            if line[:6] == 'LOADCN':
-                ldcn_name = line[6:10]
-                if ldcn_name not in loadcns:
-                    copy_line = False
-                else:
-                    copy_line = True
+                    outstr += mem_str(mem_dict, ' ') + '\n'
+            outstr += line
+            continue
 
-            if iln == sections['LOAD']:
+        # Stop copying if loadcn is not in list of loadcns to keep
+        if line[:6] == 'LOADCN':
+            ldcn_name = line[6:10]
+            if ldcn_name not in loadcns:
+                copy_line = False
+            else:
                 copy_line = True
 
-            if copy_line:
-                outstr += line
+        if iln == sections['LOAD']:
+            copy_line = True
+
+        if copy_line:
+            outstr += line
 
     with open(PATH.joinpath(newname), 'w') as f:
         f.write(outstr)
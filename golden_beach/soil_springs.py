@@ -1,4 +1,5 @@
 
+import numpy as np
 import pandas as pd
 from dataclasses import dataclass
 from pathlib import Path
@@ -21,6 +22,24 @@ class SoilRanges:
     py: str
 
 
+@dataclass
+class SoilReduction:
+    """Summary of the reduction of one set of soil curves.
+
+    Attributes:
+        curve (str): 'T-Z', 'Q-Z' or 'P-Y'.
+        max_error (float): Largest resistance error introduced, as a fraction of
+            the peak resistance of the original curve.
+        cards_before (int): Number of SOIL cards before reduction.
+        cards_after (int): Number of SOIL cards after reduction.
+
+    """
+    curve: str
+    max_error: float
+    cards_before: int
+    cards_after: int
+
+
 def read_range(xlpath: Path, start_row: int, nrow: int, cols: str) -> list[pd.DataFrame]:
 
     df = pd.read_excel(
@@ -65,6 +84,16 @@ def get_intro() -> str:
     return outstr
 
 
+def curve_points(res: pd.DataFrame, disp: pd.DataFrame, idep: int) -> tuple[np.ndarray, np.ndarray]:
+    # Resistance and displacement of one depth, without Depth. A point is
+    # dropped if either value is blank so the pairs stay aligned.
+    r = res.iloc[idep].to_numpy(dtype=float)[1:]
+    d = disp.iloc[idep].to_numpy(dtype=float)[1:]
+    ok = ~np.isnan(r) & ~np.isnan(d)
+
+    return r[ok], d[ok]
+
+
 def get_tz_str(t: pd.DataFrame, z: pd.DataFrame, title: str) -> str:
 
     t = t.drop_duplicates('Depth', keep='first').reset_index(drop=True)
@@ -76,8 +105,7 @@ def get_tz_str(t: pd.DataFrame, z: pd.DataFrame, title: str) -> str:
     outstr += 'SOIL TZAXIAL HEAD' + f'{ndep: >3}' + ' '*20 + 'SOL1\n'
 
     for idep in range(ndep):
-        t_kpa = t.iloc[idep].to_numpy()[1:]
-        z_mm = z.iloc[idep].to_numpy()[1:]
+        t_kpa, z_mm = curve_points(t, z, idep)
         npt = len(t_kpa)
 
         outstr += 'SOIL T-Z     SLOCSM  ' + f'{npt: >2} '
@@ -112,8 +140,8 @@ def get_qz_str(q: pd.DataFrame, z: pd.DataFrame, thk: float) -> str:
     outstr = 'SOIL BEARING HEAD' + f'{ndep: >3}' + ' '*20 + 'SOL1\n'
 
     for idep in range(ndep):
-        q_kpa = q.iloc[idep].to_numpy()[1:]
-        z_mm = z.iloc[idep].to_numpy()[1:] * thk
+        q_kpa, z_mm = curve_points(q, z, idep)
+        z_mm = z_mm * thk
         npt = len(q_kpa)
 
         outstr += 'SOIL BEAR    SLOCSM  ' + f'{npt: >2} '
@@ -150,8 +178,7 @@ def get_py_str(p: pd.DataFrame, y: pd.DataFrame) -> str:
     outstr += '   YEXP   91.       SOL1                NN  10N\n'
 
     for idep in range(ndep):
-        p_kn = p.iloc[idep].to_numpy()[1:]
-        y_mm = y.iloc[idep].to_numpy()[1:]
+        p_kn, y_mm = curve_points(p, y, idep)
         npt = len(p_kn)
 
         outstr += 'SOIL P-Y     SLOCSM  ' + f'{npt: >2} '
@@ -182,6 +209,232 @@ def get_py_str(p: pd.DataFrame, y: pd.DataFrame) -> str:
     return outstr
 
 
+def interp_rows(xq: np.ndarray, x: np.ndarray, y: np.ndarray, side: str = 'right') -> np.ndarray:
+    # Linear interpolation of each row of (x, y) at the points in the same row
+    # of xq. Values are constant beyond the ends of each curve. Where x
+    # repeats (a vertical step), side 'left' gives the value before the step
+    # and 'right' the value after it.
+    m = x.shape[1]
+    if side == 'left':
+        idx = (x[:, None, :] < xq[:, :, None]).sum(axis=2)
+    else:
+        idx = (x[:, None, :] <= xq[:, :, None]).sum(axis=2)
+    idx = np.clip(idx, 1, m - 1)
+    x0 = np.take_along_axis(x, idx - 1, axis=1)
+    x1 = np.take_along_axis(x, idx, axis=1)
+    y0 = np.take_along_axis(y, idx - 1, axis=1)
+    y1 = np.take_along_axis(y, idx, axis=1)
+    dx = x1 - x0
+    # Zero length segments are only found at the ends of a curve
+    past = (xq > x1) if side == 'left' else (xq >= x1)
+    frac = np.divide(xq - x0, dx, out=past.astype(float), where=dx != 0)
+
+    return y0 + (y1 - y0) * np.clip(frac, 0.0, 1.0)
+
+
+def point_error(xq: np.ndarray, yq: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    # Distance of the points (xq, yq) from the curve (x, y) in the same row.
+    # At a vertical step the curve covers all values between both sides.
+    lo = interp_rows(xq, x, y, side='left')
+    hi = interp_rows(xq, x, y, side='right')
+
+    return np.maximum(np.maximum(np.minimum(lo, hi) - yq, yq - np.maximum(lo, hi)), 0.0)
+
+
+def curve_error(r0: np.ndarray, d0: np.ndarray, r1: np.ndarray, d1: np.ndarray) -> float:
+    # Largest difference between two curves, evaluated at the points of each
+    # curve as a fraction of that curve's peak resistance. Blank points are
+    # ignored.
+    ok0 = ~np.isnan(r0) & ~np.isnan(d0)
+    ok1 = ~np.isnan(r1) & ~np.isnan(d1)
+    r0, d0, r1, d1 = r0[ok0], d0[ok0], r1[ok1], d1[ok1]
+    err0 = point_error(d0[None, :], r0[None, :], d1[None, :], r1[None, :]).max(initial=0.0)
+    err1 = point_error(d1[None, :], r1[None, :], d0[None, :], r0[None, :]).max(initial=0.0)
+
+    return max(err0 / (np.abs(r0).max(initial=0.0) or 1.0),
+               err1 / (np.abs(r1).max(initial=0.0) or 1.0))
+
+
+def merge_layers(res: np.ndarray, disp: np.ndarray, tol: float) -> np.ndarray:
+    # Returns index of the row used for each depth. A layer is merged into the
+    # layer above if their curves match within tol. The first and last rows
+    # are always kept (the last row sets the bottom of the Q-Z layers).
+    ndep = res.shape[0]
+    refs = np.arange(ndep)
+    iref = 0
+    for idep in range(1, ndep - 1):
+        if curve_error(res[iref], disp[iref], res[idep], disp[idep]) <= tol:
+            refs[idep] = iref
+        else:
+            iref = idep
+
+    return refs
+
+
+def simplify_curves(res: np.ndarray, disp: np.ndarray, tol: float,
+                    extra: tuple[np.ndarray, np.ndarray, np.ndarray] | None = None) -> np.ndarray:
+    # Returns mask of points to keep. For all depths at once, the interior point
+    # whose removal gives the smallest error is removed, until the error would
+    # exceed tol. The error is checked against all original points between the
+    # neighbouring kept points. End points are always kept.
+    # extra is (res, disp, peak) of more points to check for each depth (e.g.
+    # the points of layers merged into it), NaN padded, each with its own peak.
+    # Blank points are never kept.
+    ndep, npt = res.shape
+    peak = np.abs(np.nan_to_num(res)).max(axis=1)
+    peak[peak == 0] = 1.0
+    ok = ~np.isnan(res) & ~np.isnan(disp)
+    keep = ok.copy()
+    pos = np.arange(npt)
+    rows = np.arange(ndep)
+
+    while True:
+        prev = np.maximum.accumulate(np.where(keep, pos, -1), axis=1)
+        prev = np.concatenate([np.full((ndep, 1), -1), prev[:, :-1]], axis=1)
+        nxt = np.minimum.accumulate(np.where(keep, pos, npt)[:, ::-1], axis=1)[:, ::-1]
+        nxt = np.concatenate([nxt[:, 1:], np.full((ndep, 1), npt)], axis=1)
+        valid = keep & (prev >= 0) & (nxt < npt)
+        if not valid.any():
+            break
+
+        i0 = np.clip(prev, 0, npt - 1)
+        i1 = np.clip(nxt, 0, npt - 1)
+        x0 = np.take_along_axis(disp, i0, axis=1)[:, :, None]
+        x1 = np.take_along_axis(disp, i1, axis=1)[:, :, None]
+        y0 = np.take_along_axis(res, i0, axis=1)[:, :, None]
+        y1 = np.take_along_axis(res, i1, axis=1)[:, :, None]
+
+        # Chord through neighbours of each candidate point, at every original point
+        dx = x1 - x0
+        xj = np.broadcast_to(disp[:, None, :], (ndep, npt, npt))
+        frac = np.divide(xj - x0, dx, out=np.zeros((ndep, npt, npt)), where=dx != 0)
+        chord = y0 + (y1 - y0) * frac
+        span = (pos[None, None, :] > prev[:, :, None]) & (pos[None, None, :] < nxt[:, :, None])
+        span &= ok[:, None, :]
+        dev = np.where(span, np.abs(chord - res[:, None, :]), 0.0).max(axis=2)
+        dev = dev / peak[:, None]
+        if extra is not None:
+            xm, ym, pm = (arr[:, None, :] for arr in extra)
+            frac = np.divide(xm - x0, dx, out=np.zeros((ndep, npt, xm.shape[2])), where=dx != 0)
+            chord = y0 + (y1 - y0) * frac
+            span = (xm > x0) & (xm < x1)
+            dev = np.maximum(dev, np.where(span, np.abs(chord - ym) / pm, 0.0).max(axis=2))
+        dev = np.where(valid, dev, np.inf)
+
+        best = dev.argmin(axis=1)
+        remove = dev[rows, best] <= tol
+        if not remove.any():
+            break
+        keep[rows[remove], best[remove]] = False
+
+    return keep
+
+
+def simplified_error(r: np.ndarray, d: np.ndarray, rows: np.ndarray, iref: np.ndarray,
+                     keep: np.ndarray, peak: np.ndarray) -> np.ndarray:
+    # Error of the simplified curves at the original points of every depth,
+    # relative to the peak of each depth. Dropped points are replaced by the
+    # last kept point, which interp_rows treats as a constant extension.
+    # Blank original points are ignored.
+    order = np.argsort(~keep, axis=1, kind='stable')
+    nkeep = keep.sum(axis=1)
+    pad = np.arange(keep.shape[1])[None, :] >= nkeep[:, None]
+    last = np.take_along_axis(order, nkeep[:, None] - 1, axis=1)
+    r_fill = np.where(pad, np.take_along_axis(r[rows], last, axis=1),
+                      np.take_along_axis(r[rows], order, axis=1))
+    d_fill = np.where(pad, np.take_along_axis(d[rows], last, axis=1),
+                      np.take_along_axis(d[rows], order, axis=1))
+
+    ok = ~np.isnan(r) & ~np.isnan(d)
+    err = point_error(np.nan_to_num(d), np.nan_to_num(r), d_fill[iref], r_fill[iref])
+
+    return err.max(axis=1, where=ok, initial=0.0) / peak
+
+
+def reduce_soil_curves(res: pd.DataFrame, disp: pd.DataFrame,
+                       tol: float) -> tuple[pd.DataFrame, pd.DataFrame, float]:
+    """Merge similar depth layers and remove points from soil curves.
+
+    Adjacent depth layers are merged if their curves match within tol, then
+    each curve is simplified, removing points that can be linearly
+    interpolated within tol of the original points of every layer merged into
+    it. Resistance errors are relative to the peak resistance of each
+    original curve, e.g. tol=0.02 is 2% of the peak. Where a curve has a
+    vertical step (points at equal displacement) the error is measured from
+    both sides of the step. Blank points (resistance or displacement) are
+    ignored. The returned error is never larger than tol.
+
+    Args:
+        res (pd.DataFrame): Resistance (T, Q or P), Depth in first column.
+        disp (pd.DataFrame): Displacement (Z or Y), Depth in first column.
+        tol (float): Relative tolerance.
+
+    Returns:
+        Reduced resistance and displacement (padded with NaN where curves have
+        fewer points), and the largest error introduced relative to the
+        original curves.
+
+    """
+
+    depths = res['Depth'].to_numpy()
+    r = res.iloc[:, 1:].to_numpy(dtype=float)
+    d = disp.iloc[:, 1:].to_numpy(dtype=float)
+
+    # Blank points moved to the end of each row
+    ok = ~np.isnan(r) & ~np.isnan(d)
+    order = np.argsort(~ok, axis=1, kind='stable')
+    ok = np.take_along_axis(ok, order, axis=1)
+    r = np.where(ok, np.take_along_axis(r, order, axis=1), np.nan)
+    d = np.where(ok, np.take_along_axis(d, order, axis=1), np.nan)
+    peak = np.abs(np.nan_to_num(r)).max(axis=1)
+    peak[peak == 0] = 1.0
+
+    refs = merge_layers(r, d, tol)
+    rows, iref = np.unique(refs, return_inverse=True)
+
+    # Points of the other layers merged into each kept layer
+    merged = refs != np.arange(len(refs))
+    nmerged = np.bincount(iref[merged], minlength=len(rows))
+    ncol = max(nmerged.max(initial=0), 1) * r.shape[1]
+    extra = np.full((3, len(rows), ncol), np.nan)
+    for irow in range(len(rows)):
+        members = np.flatnonzero(merged & (iref == irow))
+        extra[0, irow, :members.size * r.shape[1]] = d[members].ravel()
+        extra[1, irow, :members.size * r.shape[1]] = r[members].ravel()
+        extra[2, irow, :members.size * r.shape[1]] = np.repeat(peak[members], r.shape[1])
+
+    keep = simplify_curves(r[rows], d[rows], tol, extra=tuple(extra))
+    err = simplified_error(r, d, rows, iref, keep, peak)
+    # Merged points at the same displacement as a kept point aren't checked
+    # by simplify_curves, layers still out of tolerance are not simplified
+    undo = np.bincount(iref, weights=err > tol, minlength=len(rows)) > 0
+    if undo.any():
+        keep[undo] = ok[rows][undo]
+        err = simplified_error(r, d, rows, iref, keep, peak)
+    max_error = float(err.max()) if len(err) else 0.0
+
+    # Move kept points to the left of each row, pad with NaN
+    order = np.argsort(~keep, axis=1, kind='stable')
+    nkeep = keep.sum(axis=1)
+    npt = nkeep.max()
+    pad = np.arange(npt)[None, :] >= nkeep[:, None]
+    r_new = np.take_along_axis(r[rows], order, axis=1)[:, :npt]
+    d_new = np.take_along_axis(d[rows], order, axis=1)[:, :npt]
+    r_new[pad] = np.nan
+    d_new[pad] = np.nan
+
+    columns = ['Depth'] + [i for i in range(1, npt + 1)]
+    res_new = pd.DataFrame(np.column_stack([depths[rows], r_new]), columns=columns)
+    disp_new = pd.DataFrame(np.column_stack([depths[rows], d_new]), columns=columns)
+
+    return res_new, disp_new, max_error
+
+
+def count_cards(outstr: str) -> int:
+
+    return sum(line[:4] == 'SOIL' for line in outstr.splitlines())
+
+
 def split_cell_address(cell_address: str) -> tuple[int, str]:
 
     for ichar, letter in enumerate(cell_address):
@@ -210,7 +463,8 @@ def range_to_ind(rng: str) -> tuple[int, int, str]:
 
 
 def write_soil_springs(xlname: str, outname: str, ranges: SoilRanges,
-                       tz_title: str, B: float) -> None:
+                       tz_title: str, B: float,
+                       tol: float | None = None) -> list[SoilReduction]:
     """Write soil springs data from spreadsheet to SACS format file.
 
     Args:
@@ -219,26 +473,49 @@ def write_soil_springs(xlname: str, outname: str, ranges: SoilRanges,
         ranges (SoilRanges): SoilRanges object.
         tz_title (str): Title to be added as comment at start of T-Z section.
         B (float): For plugged pile = OD, unplugged=WT, in cm
+        tol (float): If given, merge depth layers and simplify curves within
+            this relative tolerance (see reduce_soil_curves).
+
+    Returns:
+        List of SoilReduction objects (T-Z, Q-Z, P-Y), empty if tol is None.
 
     """
 
     xlpath = PATH.joinpath(xlname)
     outpath = PATH.joinpath(outname)
+    reductions = []
 
     # T-Z
     start_row, nrow, cols = range_to_ind(ranges.tz)
     t, z = read_range(xlpath, start_row, nrow, cols)
     tz_str = get_tz_str(t, z, tz_title)
+    if tol is not None:
+        t, z = t.drop_duplicates('Depth'), z.drop_duplicates('Depth')
+        t, z, err = reduce_soil_curves(t, z, tol)
+        reduced = get_tz_str(t, z, tz_title)
+        reductions.append(SoilReduction('T-Z', err, count_cards(tz_str), count_cards(reduced)))
+        tz_str = reduced
 
     # Q-Z
     start_row, nrow, cols = range_to_ind(ranges.qz)
     q, z = read_range(xlpath, start_row, nrow, cols)
     qz_str = get_qz_str(q, z, thk=B)
+    if tol is not None:
+        q, z = q.drop_duplicates('Depth'), z.drop_duplicates('Depth')
+        q, z, err = reduce_soil_curves(q, z, tol)
+        reduced = get_qz_str(q, z, thk=B)
+        reductions.append(SoilReduction('Q-Z', err, count_cards(qz_str), count_cards(reduced)))
+        qz_str = reduced
 
     # P-Y
     start_row, nrow, cols = range_to_ind(ranges.py)
     p, y = read_range(xlpath, start_row, nrow, cols)
     py_str = get_py_str(p, y)
+    if tol is not None:
+        p, y, err = reduce_soil_curves(p, y, tol)
+        reduced = get_py_str(p, y)
+        reductions.append(SoilReduction('P-Y', err, count_cards(py_str), count_cards(reduced)))
+        py_str = reduced
 
     outstr = get_intro()
     outstr += tz_str
@@ -250,6 +527,8 @@ def write_soil_springs(xlname: str, outname: str, ranges: SoilRanges,
     with open(outpath, 'w') as f:
         f.write(outstr)
 
+    return reductions
+
 
 def main():
 
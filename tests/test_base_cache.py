@@ -0,0 +1,52 @@
+
+from golden_beach.base_cache import load_base_deck, cache_path
+
+BASE = """\
+LDOPT       NF+Z1.025000  7.849000 -80.00 80.00GLOBMN
+CODE  AA
+JOINT
+JOINT PS01   1.000  2.000  3.000
+JOINT PS02   4.000  5.000  6.000                      111111
+MEMBER
+MEMBER PS01PS02 W01
+MEMBER OFFSETS                      1.00
+GRUP
+GRUP W01         50.00  1.000                         1
+LOAD
+LOADCN0010
+LOAD   PS01         0.0    0.0 -120.3    0.0     0.0    0.0 GLOB JOIN       PS01
+END
+"""
+
+
+def test_load_base_deck(tmp_path):
+
+    basepath = tmp_path / 'sacinp.base'
+    basepath.write_text(BASE)
+
+    deck = load_base_deck(basepath)
+    assert cache_path(basepath).exists()
+    assert deck.sections == {'CODE': 1, 'JOINT': 4, 'MEMBER': 7, 'LOAD': 12, 'END': 13}
+    assert deck.joints == {'PS01': 3, 'PS02': 4}
+    assert deck.members == {'PS01PS02': 6}
+
+    # Second load comes from the cache
+    cached = load_base_deck(basepath)
+    assert cached.lines == deck.lines
+    assert cached.sections == deck.sections
+    assert cached.joints == deck.joints
+    assert cached.members == deck.members
+
+    # Stale cache is rebuilt
+    basepath.write_text(BASE.replace('JOINT PS02', 'JOINT PS03'))
+    deck = load_base_deck(basepath)
+    assert deck.joints == {'PS01': 3, 'PS03': 4}
+
+
+def test_cache_size_bound(tmp_path):
+
+    basepath = tmp_path / 'sacinp.base'
+    basepath.write_text(BASE)
+
+    load_base_deck(basepath, max_bytes=10)
+    assert not cache_path(basepath).exists()
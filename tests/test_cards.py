@@ -0,0 +1,92 @@
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from golden_beach.cards import (read_cards, read_soil_curves, read_deck, loads_to_str,
+                                joints_to_str, members_to_str)
+from golden_beach.soil_springs import get_py_str
+
+DECK = b"""\
+JOINT
+JOINT PS01   1.000  2.000  3.000
+JOINT PS02   4.000  5.000  6.000                      PILEHD
+MEMBER
+MEMBER PS01PS02 W01
+MEMBER1PS02PS03 W02   111000000111  45.0
+MEMBER OFFSETS                      1.00
+"""
+
+
+def test_read_loads():
+
+    fname = Path(__file__).parent.absolute() / 'loadcn.txt'
+    loads = read_cards(fname, 'LOAD')
+
+    assert loads[0]['loadcn'] == 'C000'
+    assert loads[0]['joint'] == 'PS01'
+    assert loads[0]['fx'] == 129.4
+    assert loads[0]['remark'] == 'PS01_0'
+    assert len(read_cards(fname, 'LOADCN')) * 19 == len(loads)
+
+    # Round trip through load_str
+    with open(fname, 'r') as f:
+        lines = [line for line in f if line[:5] == 'LOAD ']
+    assert loads_to_str(loads) == ''.join(lines)
+
+
+def test_read_joints_members():
+
+    deck = read_deck(DECK)
+
+    joints = deck['JOINT']
+    assert joints['joint'].tolist() == ['PS01', 'PS02']
+    assert joints['z'].tolist() == [3.0, 6.0]
+    assert joints['fixity'].tolist() == ['', 'PILEHD']
+    assert joints_to_str(joints).encode() == b''.join(DECK.splitlines(True)[1:3])
+
+    # Offsets in cm are included in the coordinates
+    joints = read_cards(b'JOINT PS03  10.000 -5.000  2.000  50.00 -25.00  12.50 111111', 'JOINT')
+    assert joints[0]['dx'] == 50.0
+    assert np.allclose(joints[['x', 'y', 'z']][0].tolist(), [10.5, -5.25, 2.125])
+    assert joints[0]['fixity'] == '111111'
+
+    members = deck['MEMBER']
+    assert members['grup'].tolist() == ['W01', 'W02']
+    assert members['fix_b'].tolist() == ['', '000111']
+    assert np.isnan(members['angle'][0]) and members['angle'][1] == 45.0
+    members_new = read_cards(members_to_str(members).encode(), 'MEMBER')
+    assert (members_new[['joint_a', 'joint_b', 'grup', 'fix_a']] ==
+            members[['joint_a', 'joint_b', 'grup', 'fix_a']]).all()
+
+
+def test_read_deck_member_loads():
+
+    # Member loads (UNIF, CONC) use other columns and are not read as LOAD
+    deck = read_deck(DECK + b"""\
+LOADCN   1
+LOAD Z  01010102     0.000 -2.500 10.000 -2.500          GLOB UNIF       DL
+LOAD   PS01         0.0    0.0 -120.3    0.0     0.0    0.0 GLOB JOIN       PS01
+LOAD Z  01010102     5.000 -1.000                        GLOB CONC       DL
+""")
+
+    loads = deck['LOAD']
+    assert loads['joint'].tolist() == ['PS01']
+    assert loads['loadcn'].tolist() == ['1']
+    assert loads['fz'].tolist() == [-120.3]
+
+
+def test_read_soil_curves():
+
+    y = np.linspace(0.0, 20.0, 7)
+    columns = ['Depth'] + [i for i in range(1, 8)]
+    p = pd.DataFrame([[0.0] + list(y * 5), [2.0] + list(y * 50)], columns=columns)
+    y = pd.DataFrame([[0.0] + list(y), [2.0] + list(y)], columns=columns)
+
+    curves = read_soil_curves(get_py_str(p, y).encode())
+
+    assert curves['kind'].tolist() == ['P-Y', 'P-Y']
+    assert curves['npt'].tolist() == [7, 7]
+    assert curves['ztop'].tolist() == [0.0, 2.0]
+    # Continuation lines joined, 1.67-1 is 0.167
+    np.testing.assert_allclose(curves['res'][0], p.iloc[0, 1:] / 100, atol=0.005)
+    np.testing.assert_allclose(curves['disp'][1], y.iloc[1, 1:] / 10, atol=0.0005)
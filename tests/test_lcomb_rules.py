@@ -0,0 +1,81 @@
+import pytest
+from golden_beach.lcomb_rules import CaseGroup, LcombRule, generate_lcombs, lcomb_rules_str
+
+
+def test_generate_lcombs():
+
+    groups = [
+        CaseGroup('dead', ['0010', '0011']),
+        CaseGroup('pipe', ['C000', 'C090'], axis='dir'),
+        CaseGroup('env', ['A000', 'A090'], axis='dir'),
+        CaseGroup('wind', ['W000', 'W090', 'W180'], axis='wdir'),
+    ]
+    factors = [{'dead': 1.1, 'pipe': 1.0, 'env': 1.35}, {'dead': 0.9, 'wind': 1.0}]
+    rule = LcombRule(groups, factors, prefix='A', start=1)
+
+    names, loadcns, matrix = generate_lcombs([rule])
+
+    # 2 directions for pipe/env (expanded together), then 3 for wind
+    assert names == ['A001', 'A002', 'A003', 'A004', 'A005']
+    assert loadcns == ['0010', '0011', 'C000', 'C090', 'A000', 'A090', 'W000', 'W090', 'W180']
+    assert matrix[1].tolist() == [1.1, 1.1, 0.0, 1.0, 0.0, 1.35, 0.0, 0.0, 0.0]
+    assert matrix[4].tolist() == [0.9, 0.9, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0]
+    assert len({tuple(row) for row in matrix}) == len(matrix)
+
+    lcomb, lcsel = lcomb_rules_str([rule])
+    lines = lcomb.splitlines()
+    assert lines[0] == 'LCOMB'
+    assert lines[1] == 'LCOMB A001 0010 1.1000011 1.100C000 1.000A000 1.350'
+    assert lcsel == 'LCSEL IN       ' + ''.join(f'{name: >5}' for name in names) + '\n'
+
+
+def test_generate_lcombs_no_axis():
+
+    groups = [CaseGroup('dead', ['0010']), CaseGroup('pipe', ['C000', 'C090'], axis='dir')]
+    rule = LcombRule(groups, [{'dead': 1.0}, {'dead': 1.0, 'pipe': 1.0}], prefix='B')
+
+    names, loadcns, matrix = generate_lcombs([rule])
+
+    assert names == ['B001', 'B002', 'B003']
+    assert matrix.tolist() == [[1.0, 0.0, 0.0], [1.0, 1.0, 0.0], [1.0, 0.0, 1.0]]
+
+
+def test_generate_10k_lcombs():
+
+    dirs = [f'{d:03d}' for d in range(0, 360, 30)]
+    groups = [
+        CaseGroup('dead', ['0010', '0011']),
+        CaseGroup('live', ['0020']),
+        CaseGroup('pipe', ['C' + d for d in dirs], axis='pdir'),
+        CaseGroup('env', ['A' + d for d in dirs], axis='dir'),
+    ]
+    factors = [{'dead': 1.0 + 0.01 * i, 'live': 1.0, 'pipe': 1.0, 'env': 1.35} for i in range(35)]
+    rules = [LcombRule(groups, factors, start=1), LcombRule(groups, factors[:34], start=5041)]
+
+    lcomb, lcsel = lcomb_rules_str(rules)
+
+    assert lcomb.count('\n') == 1 + 5040 + 4896
+    assert lcsel.splitlines()[-1].split()[-1] == '9936'
+
+
+def test_lcomb_factor_width():
+
+    groups = [CaseGroup('dead', ['0010']), CaseGroup('live', ['0020'])]
+    rule = LcombRule(groups, [{'dead': 125.0, 'live': -12.5}], prefix='X')
+
+    lcomb, lcsel = lcomb_rules_str([rule])
+
+    assert lcomb.splitlines()[1] == 'LCOMB X001 0010125.000020-12.50'
+
+    with pytest.raises(ValueError):
+        lcomb_rules_str([LcombRule(groups, [{'dead': 1.0e6}])])
+
+
+def test_generate_lcombs_empty():
+
+    groups = [CaseGroup('dead', ['0010']), CaseGroup('live', ['0010'])]
+
+    with pytest.raises(ValueError):
+        generate_lcombs([LcombRule(groups, [{'dead': 1.0}, {}])])
+    with pytest.raises(ValueError):
+        generate_lcombs([LcombRule(groups, [{'dead': 1.0, 'live': -1.0}])])
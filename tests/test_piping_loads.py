@@ -1,18 +1,156 @@
 
+import tempfile
 from pathlib import Path
-from golden_beach.piping_loads import write_piping_loads
+import numpy as np
+from openpyxl import Workbook
+from golden_beach.piping_loads import (write_piping_loads, iter_loadcn_blocks, governing_cases,
+                                       reduce_piping_loads)
 
 
-def test_write_loads():
+def test_write_loads(tmp_path):
 
     xlname = Path(__file__).parent.absolute() / 'connector_loads.xlsx'
-    outname = Path(__file__).parent.absolute() / 'loadcn.txt'
+    refname = Path(__file__).parent.absolute() / 'loadcn.txt'
+    outname = tmp_path / 'loadcn.txt'
 
     write_piping_loads(xlname, outname)
 
+    assert outname.read_text() == refname.read_text()
+
+
+def test_table_extent(tmp_path):
+
+    nsup = 500
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Load Case ID'
+    ws.append(['Case', 'Sheet', 'Column', 'LOADCN', 'LOADLB', 'LOAD_ID', 'SUFFIX'])
+    ws.append(['West', 'Loads', 2, 'C000', 'West', 'PSXX', '0'])
+    ws.append(['South', 'Loads', 8, 'C090', 'South', 'PIPE', None])
+    ws = wb.create_sheet('Loads')
+    ws.append([None, 'West', None, None, None, None, None, 'South'])
+    ws.append(['Support Label'] + ['fx', 'fy', 'fz', 'mx', 'my', 'mz'] * 2)
+    for isup in range(nsup):
+        ws.append([f'S{isup:03d}'] + [1000.0 * isup] * 12)
+    ws.append([])
+    ws.append([None] + [999999.0] * 12)  # totals row after blank is ignored
+    xlname = tmp_path / 'loads.xlsx'
+    wb.save(xlname)
+
+    blocks = list(iter_loadcn_blocks(xlname))
+    assert len(blocks) == 2
+    lines = blocks[1].splitlines()
+    assert len(lines) == nsup + 2
+    assert lines[0] == 'LOADCNC090 1.00'
+    assert lines[-1] == 'LOAD   S499       499.0  499.0  499.0  499.0   499.0  499.0 GLOB JOIN       PIPE'
+
+
+def test_table_title(tmp_path):
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Load Case ID'
+    ws.append(['Case', 'Sheet', 'Column', 'LOADCN', 'LOADLB', 'LOAD_ID', 'SUFFIX'])
+    ws.append(['West', 'Loads', 3, 'C000', 'West', 'PIPE', None])
+    ws = wb.create_sheet('Loads')
+    ws.append(['Operating loads (N, Nm)'])
+    ws.append([])
+    ws.append([None, 'Support Label'] + ['fx', 'fy', 'fz', 'mx', 'my', 'mz'])
+    ws.append([None, 'S000'])  # first support with blank data is read as zero
+    ws.append([None, 'S001'] + [1000.0] * 6)
+    ws.append([None, 'S002'] + [2000.0, None, 2000.0, 2000.0, 2000.0, 2000.0])
+    xlname = tmp_path / 'loads.xlsx'
+    wb.save(xlname)
+
+    lines = next(iter_loadcn_blocks(xlname)).splitlines()
+    assert lines == [
+        'LOADCNC000 1.00',
+        'LOADLBC000 West',
+        'LOAD   S000         0.0    0.0    0.0    0.0     0.0    0.0 GLOB JOIN       PIPE',
+        'LOAD   S001         1.0    1.0    1.0    1.0     1.0    1.0 GLOB JOIN       PIPE',
+        'LOAD   S002         2.0    0.0    2.0    2.0     2.0    2.0 GLOB JOIN       PIPE',
+    ]
+
+
+def test_governing_cases():
+
+    base = np.array([[10.0, -5.0, 0.0, 0.0, 2.0, 0.0], [0.0, 0.0, -20.0, 0.0, 0.0, 0.0]])
+    loads = np.stack([
+        0.5 * base,
+        base,
+        base + 0.05,                # near duplicate of 1, slightly larger
+        -base,                      # opposite sign, governs
+        base * [1, 1, 1, 1, 3, 1],  # larger my, governs
+    ])
+
+    gov = governing_cases(loads, tol=0.1)
+    assert gov.tolist() == [4, 4, 4, 3, 4]
+
+    gov = governing_cases(loads[:4], tol=0.1)
+    assert gov.tolist() == [2, 2, 2, 3]
+
+
+def test_reduce_piping_loads(tmp_path):
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Load Case ID'
+    ws.append(['Case', 'Sheet', 'Column', 'LOADCN', 'LOADLB', 'LOAD_ID', 'SUFFIX'])
+    ws.append(['A', 'Loads', 2, 'C000', 'A', 'PIPE', None])
+    ws.append(['B', 'Loads', 8, 'C090', 'B', 'PIPE', None])
+    ws.append(['C', 'Loads', 14, 'C180', 'C', 'PIPE', None])
+    ws = wb.create_sheet('Loads')
+    ws.append([None])
+    ws.append(['Support Label'] + ['fx', 'fy', 'fz', 'mx', 'my', 'mz'] * 3)
+    ws.append(['PS01'] + [1000.0] * 6 + [2000.0] * 6 + [1020.0] * 6)
+    ws.append(['PS02'] + [-1000.0] * 6 + [-2000.0] * 6 + [-3000.0] * 6)
+    xlname = tmp_path / 'loads.xlsx'
+    wb.save(xlname)
+    outname = tmp_path / 'loadcn.txt'
+    reportname = tmp_path / 'report.csv'
+
+    report = reduce_piping_loads(xlname, outname, tol=0.1, reportname=reportname)
+
+    assert report['GOVERNING'].tolist() == ['C090', 'C090', 'C180']
+    assert report['MAX_DIFF'].tolist() == [1.0, 0.0, 0.0]
+    lines = outname.read_text().splitlines()
+    assert [line for line in lines if line[:6] == 'LOADCN'] == ['LOADCNC090 1.00', 'LOADCNC180 1.00']
+    assert reportname.exists()
+
+
+def test_reduce_piping_loads_as_read(tmp_path):
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Load Case ID'
+    ws.append(['Case', 'Sheet', 'Column', 'LOADCN', 'LOADLB', 'LOAD_ID', 'SUFFIX'])
+    ws.append(['A', 'Loads', 2, 'C000', 'A', 'PIPE', None])
+    ws.append(['B', 'Loads', 8, 'C090', 'B', 'PIPE', None])
+    ws.append(['C', 'More', 2, 'C180', 'C', 'PIPE', None])
+    ws = wb.create_sheet('Loads')
+    ws.append(['Support Label'] + ['fx', 'fy', 'fz', 'mx', 'my', 'mz'] * 2)
+    ws.append(['PS02'] + [100.0] * 6 + [300.0] * 6)
+    # Repeated label, loads are summed when comparing (A 1.2 > B 1.0)
+    ws.append(['PS01'] + [900.0] * 6 + [0.0] * 6)
+    ws.append(['PS01'] + [300.0] * 6 + [1000.0] * 6)
+    ws = wb.create_sheet('More')
+    ws.append(['Support Label'] + ['fx', 'fy', 'fz', 'mx', 'my', 'mz'])
+    ws.append(['PS01'] + [-1000.0] * 6)
+    ws.append(['PS02'] + [0.0] * 6)
+    xlname = tmp_path / 'loads.xlsx'
+    wb.save(xlname)
+    outname = tmp_path / 'loadcn.txt'
+
+    report = reduce_piping_loads(xlname, outname, tol=0.1)
+
+    assert report['GOVERNING'].tolist() == ['C000', 'C090', 'C180']
+    # Same LOAD lines and order as write_piping_loads
+    assert outname.read_text() == ''.join(iter_loadcn_blocks(xlname))
+
 
 def main():
-    test_write_loads()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        test_write_loads(Path(tmpdir))
 
 
 if __name__ == "__main__":
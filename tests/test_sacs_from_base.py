@@ -0,0 +1,92 @@
+
+import pandas as pd
+from golden_beach.base_cache import cache_path
+from golden_beach.sacs_from_base import make_new_model
+
+BASE = """\
+TITLE
+****   ANALYSIS TYPE  : X                                                            *
+LDOPT       NF+Z1.025000  7.849000 -80.00 80.00GLOBMN
+CODE  AA
+UCPART
+JOINT
+JOINT PS01   1.000  2.000  3.000
+JOINT PS01                                            111111
+JOINT PS02   4.000  5.000  6.000
+JOINT PS03   7.000  8.000  9.000
+MEMBER
+MEMBER PS01PS02 W01
+MEMBER OFFSETS                      1.00
+MEMBER PS02PS03 W01
+GRUP
+GRUP W01         50.00  1.000                         1
+LOAD
+LOADCN0010
+LOAD   PS01         0.0    0.0 -120.3    0.0     0.0    0.0 GLOB JOIN       PS01
+END
+***ADD LCOMB
+"""
+
+JOINT_COLS = ['JNT', 'X', 'Y', 'Z', 'FX', 'FY', 'FZ', 'FRX', 'FRY', 'FRZ', 'Special']
+MEMBER_COLS = ['A', 'B', 'GRUP', 'STRESS', 'GAP', 'FIX_A', 'FIX_B', 'ANGLE',
+               'OFF_AX', 'OFF_AY', 'OFF_AZ', 'OFF_BX', 'OFF_BY', 'OFF_BZ']
+
+
+def write_workbook(xlname):
+
+    # PS01 and PS01PS02 modified, PS09 and PS03PS09 new
+    joints = pd.DataFrame([['PS01', 1.5, 2.0, 3.0] + [None] * 6 + ['PILEHD'],
+                           ['PS09', 1.0, 1.0, 1.0, 'F', 'F', 'F', None, None, None, None]],
+                          columns=JOINT_COLS)
+    members = pd.DataFrame([['PS01', 'PS02', 'W02'] + [None] * 11,
+                            ['PS03', 'PS09', 'W01'] + [None] * 11], columns=MEMBER_COLS)
+
+    with pd.ExcelWriter(xlname) as writer:
+        pd.DataFrame([['Title', 'New model'], ['Type', 'Inplace']]).to_excel(
+            writer, sheet_name='TITLE', header=False, index=False)
+        joints.to_excel(writer, sheet_name='joints', startrow=1, index=False)
+        members.to_excel(writer, sheet_name='members', startrow=1, index=False)
+        pd.DataFrame([['Flooded', None], ['Water depth', 20.0], ['Groups', None]]).to_excel(
+            writer, sheet_name='FLOOD', header=False, index=False)
+        pd.DataFrame([['Type', 'IN'], ['LC', '0010']]).to_excel(
+            writer, sheet_name='LCSEL', startrow=1, header=False, index=False)
+        pd.DataFrame({'ID': [10], 'Description': ['DEAD'], 'Keep_YN': ['y']}).to_excel(
+            writer, sheet_name='LOADCN', index=False)
+        pd.DataFrame({'LOADCN': ['0010'], 'A': [None], 'B': [None], 1001: [1.1]}).to_excel(
+            writer, sheet_name='LCOMB', startrow=1, index=False)
+        pd.DataFrame([['Notes']]).to_excel(writer, sheet_name='Notes', header=False, index=False)
+
+
+def test_make_new_model(tmp_path):
+
+    xlname = tmp_path / 'model.xlsx'
+    basename = tmp_path / 'sacinp.base'
+    write_workbook(xlname)
+    basename.write_text(BASE)
+
+    outputs = []
+    for use_cache in [False, True, True]:
+        newname = tmp_path / 'sacinp.new'
+        make_new_model(xlname, basename, newname, use_cache=use_cache)
+        outputs.append(newname.read_text())
+    assert cache_path(basename).exists()
+    # No cache, cache written and cache read give the same model
+    assert outputs[1] == outputs[0] and outputs[2] == outputs[0]
+
+    lines = [line.rstrip() for line in outputs[0].splitlines()]
+    start = lines.index('JOINT')
+    end = lines.index('GRUP')
+    assert lines[start:end] == [
+        'JOINT',
+        # Modified joint, second (fixity) line of the base joint dropped
+        'JOINT PS01   1.500  2.000  3.000                      PILEHD',
+        'JOINT PS02   4.000  5.000  6.000',
+        'JOINT PS03   7.000  8.000  9.000',
+        'JOINT PS09   1.000  1.000  1.000                      111000',
+        'MEMBER',
+        # Modified member keeps its OFFSETS line
+        'MEMBER PS01PS02 W02',
+        'MEMBER OFFSETS                      1.00',
+        'MEMBER PS02PS03 W01',
+        'MEMBER PS03PS09 W01',
+    ]
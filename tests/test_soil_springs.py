@@ -0,0 +1,116 @@
+
+import numpy as np
+import pandas as pd
+from golden_beach.soil_springs import reduce_soil_curves, get_tz_str, count_cards, interp_rows
+
+
+def make_curves(depths: list[float], peaks: list[float]) -> tuple[pd.DataFrame, pd.DataFrame]:
+
+    z = np.linspace(0.0, 20.0, 11)
+    # Linear to peak at z=5, then flat
+    t = np.minimum(z / 5.0, 1.0)
+    columns = ['Depth'] + [i for i in range(1, len(z) + 1)]
+    res = pd.DataFrame([[dep] + list(t * peak) for dep, peak in zip(depths, peaks)], columns=columns)
+    disp = pd.DataFrame([[dep] + list(z) for dep in depths], columns=columns)
+
+    return res, disp
+
+
+def test_reduce_soil_curves():
+
+    depths = [0.0, 1.0, 2.0, 3.0, 4.0, 5.0]
+    peaks = [100.0, 100.5, 101.0, 200.0, 201.0, 300.0]
+    t, z = make_curves(depths, peaks)
+
+    t_new, z_new, err = reduce_soil_curves(t, z, tol=0.02)
+
+    # Layers at 1.0, 2.0 merged into 0.0 and 4.0 into 3.0, last layer always kept
+    assert t_new['Depth'].to_list() == [0.0, 3.0, 5.0]
+    # Collinear points removed, leaving the ends and the points either side of the peak
+    assert z_new.iloc[0].to_list() == [0.0, 0.0, 4.0, 6.0, 20.0]
+    assert 0.0 < err <= 0.02
+
+    before = get_tz_str(t, z, 'TEST')
+    after = get_tz_str(t_new, z_new, 'TEST')
+    assert count_cards(after) < count_cards(before)
+    assert 'nan' not in after
+
+
+def test_reduce_soil_curves_no_change():
+
+    t, z = make_curves([0.0, 1.0, 2.0], [100.0, 200.0, 300.0])
+
+    t_new, z_new, err = reduce_soil_curves(t, z, tol=0.0)
+
+    assert t_new['Depth'].to_list() == [0.0, 1.0, 2.0]
+    assert err == 0.0
+
+
+def test_reduce_soil_curves_error_bound():
+
+    # Noisy, slightly different curves so layers merge and points are removed
+    rng = np.random.default_rng(37)
+    ndep, npt = 12, 12
+    z = np.sort(rng.uniform(0.0, 30.0, (ndep, npt)), axis=1)
+    z[:, 0] = 0.0
+    peaks = np.repeat([100.0, 150.0, 80.0], 4) * rng.uniform(0.97, 1.03, ndep)
+    t = peaks[:, None] * np.tanh(z / 5.0) * rng.uniform(0.98, 1.02, (ndep, npt))
+    columns = ['Depth'] + [i for i in range(1, npt + 1)]
+    depths = np.arange(ndep, dtype=float)
+    res = pd.DataFrame(np.column_stack([depths, t]), columns=columns)
+    disp = pd.DataFrame(np.column_stack([depths, z]), columns=columns)
+
+    for tol in [0.01, 0.02, 0.05, 0.1]:
+        t_new, z_new, err = reduce_soil_curves(res, disp, tol)
+        assert t_new.iloc[:, 1:].notna().sum().sum() < t.size
+        assert err <= tol
+
+        # Check each original layer against the reduced layer covering it
+        for idep, dep in enumerate(depths):
+            inew = np.searchsorted(t_new['Depth'].to_numpy(), dep, side='right') - 1
+            r1 = t_new.iloc[inew, 1:].dropna().to_numpy(dtype=float)
+            d1 = z_new.iloc[inew, 1:].dropna().to_numpy(dtype=float)
+            fit = interp_rows(z[idep][None, :], d1[None, :], r1[None, :])[0]
+            assert np.abs(fit - t[idep]).max() / np.abs(t[idep]).max() <= tol
+
+
+def test_tz_str_blank_points():
+
+    t, z = make_curves([0.0], [100.0])
+    t.iloc[0, 2] = np.nan  # blank resistance, displacement still given
+
+    lines = get_tz_str(t, z, 'TEST').splitlines()
+
+    assert lines[2][20:23] == ' 10'
+    # Point at z=0.2 dropped, 0.8 kN stays paired with z=0.4
+    assert lines[3] == ('SOIL         T-Z 0.0000   0.08.00-3   0.40.0100   0.60.0100   0.80.0100   1.0'
+                        '0.0100   1.20.0100   1.40.0100   1.60.0100   1.80.0100   2.0')
+
+
+def test_reduce_soil_curves_step():
+
+    # Vertical step at z=5, identical layers
+    columns = ['Depth', 1, 2, 3, 4]
+    t = pd.DataFrame([[dep, 0.0, 5.0, 10.0, 10.0] for dep in [0.0, 1.0, 2.0]], columns=columns)
+    z = pd.DataFrame([[dep, 0.0, 5.0, 5.0, 20.0] for dep in [0.0, 1.0, 2.0]], columns=columns)
+
+    t_new, z_new, err = reduce_soil_curves(t.iloc[:1], z.iloc[:1], tol=0.0)
+    assert t_new.equals(t.iloc[:1]) and z_new.equals(z.iloc[:1])
+    assert err == 0.0
+
+    t_new, z_new, err = reduce_soil_curves(t, z, tol=0.01)
+    assert t_new['Depth'].to_list() == [0.0, 2.0]
+    assert z_new.iloc[0].to_list() == [0.0, 0.0, 5.0, 5.0, 20.0]
+    assert err == 0.0
+
+
+def test_reduce_soil_curves_blank_points():
+
+    t, z = make_curves([0.0, 1.0], [100.0, 300.0])
+    t.iloc[0, -1] = np.nan  # trailing blank cell, displacement still given
+
+    t_new, z_new, err = reduce_soil_curves(t, z, tol=0.02)
+
+    assert 0.0 <= err <= 0.02
+    assert z_new.iloc[0].to_list() == [0.0, 0.0, 4.0, 6.0, 18.0]
+    assert z_new.iloc[1].to_list() == [1.0, 0.0, 4.0, 6.0, 20.0]